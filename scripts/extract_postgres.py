@@ -15,6 +15,8 @@ OUTPUT_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data')
 
 
 def extract_order_details_fact():
+    # Money columns are computed in exact numeric arithmetic and carried as
+    # integer cents, so downstream sums are exact regardless of order.
     query = '''
     SELECT 
         od.order_id as "OrderID",
@@ -35,9 +37,10 @@ def extract_order_details_fact():
         e.hire_date as "HireDate",
         e.city as "City.1",
         sh.company_name as "Shipping Company",
-        (od.unit_price * od.quantity) as "Gross Revenue",
-        (od.unit_price * od.quantity * od.discount) as "Discount ($)",
-        (od.unit_price * od.quantity) - (od.unit_price * od.quantity * od.discount) as "Net Revenue",
+        ROUND(od.unit_price::numeric * od.quantity * 100)::bigint as "Gross Revenue Cents",
+        ROUND(od.unit_price::numeric * od.quantity * od.discount::numeric * 100)::bigint as "Discount Cents",
+        ROUND(od.unit_price::numeric * od.quantity * 100)::bigint
+            - ROUND(od.unit_price::numeric * od.quantity * od.discount::numeric * 100)::bigint as "Net Revenue Cents",
         CASE 
             WHEN o.shipped_date IS NOT NULL AND o.order_date IS NOT NULL 
             THEN (o.shipped_date - o.order_date)
@@ -96,6 +99,31 @@ def extract_suppliers_dim():
     return df
 
 
+# Source tables read by each extract, used to detect when a re-extract is needed
+EXTRACT_SOURCE_TABLES = {
+    'order_details_fact.csv': ['order_details', 'orders', 'customers', 'employees', 'shippers'],
+    'product_dim.csv': ['products', 'categories'],
+    'suppliers_dim.csv': ['suppliers'],
+}
+
+
+def source_row_counts(tables):
+    conn = psycopg2.connect(**DB_CONFIG)
+    cur = conn.cursor()
+    counts = {}
+    for table in tables:
+        cur.execute(f'SELECT COUNT(*) FROM {table}')
+        counts[table] = cur.fetchone()[0]
+    cur.close()
+    conn.close()
+    return counts
+
+
+def format_cents(cents):
+    dollars, rem = divmod(int(cents), 100)
+    return f'{dollars:,}.{rem:02d}'
+
+
 def main():
     os.makedirs(OUTPUT_DIR, exist_ok=True)
     
@@ -119,9 +147,9 @@ def main():
     print()
     print('=== Summary Statistics ===')
     print(f'Total Orders: {order_details["OrderID"].nunique()}')
-    print(f'Total Gross Revenue: {order_details["Gross Revenue"].sum():,.2f}')
-    print(f'Total Discount ($): {order_details["Discount ($)"].sum():,.2f}')
-    print(f'Total Net Revenue: {order_details["Net Revenue"].sum():,.2f}')
+    print(f'Total Gross Revenue: {format_cents(order_details["Gross Revenue Cents"].sum())}')
+    print(f'Total Discount ($): {format_cents(order_details["Discount Cents"].sum())}')
+    print(f'Total Net Revenue: {format_cents(order_details["Net Revenue Cents"].sum())}')
     print(f'Total Quantity: {order_details["Quantity"].sum():,}')
     avg_days = order_details["Days to Ship"].mean()
     print(f'Average Days to Ship: {avg_days:.2f}')
@@ -9,8 +9,20 @@ from cryptography.hazmat.primitives import serialization
 DB_SUFFIX = 'f90022'
 DATABASE_NAME = f'NORTHWIND_{DB_SUFFIX}'
 SCHEMA_NAME = 'PUBLIC'
+EXPORT_STAGE = 'EXPORT_STAGE'
 DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data')
 
+ORDER_DETAILS_VIEW_QUERY = """
+    SELECT 
+        o.*,
+        p.CATEGORYNAME,
+        p.PRODUCTNAME,
+        p.UNITSINSTOCK,
+        p.UNITSONORDER
+    FROM ORDER_DETAILS_FACT o
+    LEFT JOIN PRODUCT_DIM p ON o.PRODUCTID = p.PRODUCTID
+"""
+
 
 def get_snowflake_connection():
     private_key_path = os.path.expanduser('~/.ssh/sv_pv_rsa_ket.p8')
@@ -42,67 +54,70 @@ def setup_database(conn):
     cur.execute(f'USE DATABASE {DATABASE_NAME}')
     cur.execute(f'CREATE SCHEMA IF NOT EXISTS {SCHEMA_NAME}')
     cur.execute(f'USE SCHEMA {SCHEMA_NAME}')
+    # Server-side encryption lets browsers download the app's filtered
+    # exports from presigned URLs
+    cur.execute(f"CREATE STAGE IF NOT EXISTS {EXPORT_STAGE} ENCRYPTION = (TYPE = 'SNOWFLAKE_SSE')")
     
     cur.close()
     print(f'Database {DATABASE_NAME} created')
 
 
-def load_data(conn):
-    cur = conn.cursor()
-    cur.execute(f'USE DATABASE {DATABASE_NAME}')
-    cur.execute(f'USE SCHEMA {SCHEMA_NAME}')
-    
-    # Load Order Details
-    print('Loading ORDER_DETAILS_FACT...')
+def read_order_details_extract():
     df = pd.read_csv(os.path.join(DATA_DIR, 'order_details_fact.csv'))
     df.columns = ['ORDERID', 'PRODUCTID', 'UNITPRICE', 'QUANTITY', 'DISCOUNT_PCT', 
                   'ORDERDATE', 'SHIPPEDDATE', 'COMPANYNAME', 'CONTACTNAME', 'CONTACTTITLE',
                   'CITY', 'COUNTRY', 'LASTNAME', 'EMPLOYEENAME', 'TITLE', 'HIREDATE',
-                  'EMPLOYEECITY', 'SHIPPINGCOMPANY', 'GROSSREVENUE', 'DISCOUNTAMOUNT', 
-                  'NETREVENUE', 'DAYSTOSHIP']
+                  'EMPLOYEECITY', 'SHIPPINGCOMPANY', 'GROSSREVENUE_CENTS', 'DISCOUNTAMOUNT_CENTS', 
+                  'NETREVENUE_CENTS', 'DAYSTOSHIP']
+    
+    # Money is carried as integer cents so Snowflake stores exact NUMBER values
+    for col in ['GROSSREVENUE_CENTS', 'DISCOUNTAMOUNT_CENTS', 'NETREVENUE_CENTS']:
+        df[col] = df[col].astype('int64')
     
     # Convert date columns
     df['ORDERDATE'] = pd.to_datetime(df['ORDERDATE']).dt.date
     df['SHIPPEDDATE'] = pd.to_datetime(df['SHIPPEDDATE']).dt.date
     df['HIREDATE'] = pd.to_datetime(df['HIREDATE']).dt.date
-    
-    success, nchunks, nrows, _ = write_pandas(conn, df, 'ORDER_DETAILS_FACT', auto_create_table=True, overwrite=True)
-    print(f'  Loaded {nrows} rows')
-    
-    # Load Product
-    print('Loading PRODUCT_DIM...')
+    return df
+
+
+def read_product_extract():
     df = pd.read_csv(os.path.join(DATA_DIR, 'product_dim.csv'))
     df.columns = ['CATEGORYID', 'CATEGORYNAME', 'DESCRIPTION', 'PRODUCTID', 'PRODUCTNAME',
                   'SUPPLIERID', 'UNITPRICE', 'UNITSINSTOCK', 'UNITSONORDER']
-    success, nchunks, nrows, _ = write_pandas(conn, df, 'PRODUCT_DIM', auto_create_table=True, overwrite=True)
-    print(f'  Loaded {nrows} rows')
-    
-    # Load Suppliers
-    print('Loading SUPPLIERS_DIM...')
+    return df
+
+
+def read_suppliers_extract():
     df = pd.read_csv(os.path.join(DATA_DIR, 'suppliers_dim.csv'))
     df.columns = ['SUPPLIERID', 'COMPANYNAME', 'CONTACTNAME', 'CONTACTTITLE', 'CITY', 'COUNTRY']
-    success, nchunks, nrows, _ = write_pandas(conn, df, 'SUPPLIERS_DIM', auto_create_table=True, overwrite=True)
+    return df
+
+
+def load_table(conn, table_name, df):
+    cur = conn.cursor()
+    cur.execute(f'USE DATABASE {DATABASE_NAME}')
+    cur.execute(f'USE SCHEMA {SCHEMA_NAME}')
+    
+    print(f'Loading {table_name}...')
+    success, nchunks, nrows, _ = write_pandas(conn, df, table_name, auto_create_table=True, overwrite=True)
     print(f'  Loaded {nrows} rows')
     
     cur.close()
 
 
+def load_data(conn):
+    load_table(conn, 'ORDER_DETAILS_FACT', read_order_details_extract())
+    load_table(conn, 'PRODUCT_DIM', read_product_extract())
+    load_table(conn, 'SUPPLIERS_DIM', read_suppliers_extract())
+
+
 def create_views(conn):
     cur = conn.cursor()
     cur.execute(f'USE DATABASE {DATABASE_NAME}')
     cur.execute(f'USE SCHEMA {SCHEMA_NAME}')
     
-    cur.execute("""
-    CREATE OR REPLACE VIEW V_ORDER_DETAILS AS
-    SELECT 
-        o.*,
-        p.CATEGORYNAME,
-        p.PRODUCTNAME,
-        p.UNITSINSTOCK,
-        p.UNITSONORDER
-    FROM ORDER_DETAILS_FACT o
-    LEFT JOIN PRODUCT_DIM p ON o.PRODUCTID = p.PRODUCTID
-    """)
+    cur.execute(f'CREATE OR REPLACE VIEW V_ORDER_DETAILS AS {ORDER_DETAILS_VIEW_QUERY}')
     
     cur.close()
     print('Views created')
@@ -120,15 +135,15 @@ def verify_data(conn):
     orders = cur.fetchone()[0]
     print(f'Total Orders: {orders}')
     
-    cur.execute('SELECT SUM(GROSSREVENUE) FROM ORDER_DETAILS_FACT')
+    cur.execute('SELECT SUM(GROSSREVENUE_CENTS) / 100 FROM ORDER_DETAILS_FACT')
     gross = cur.fetchone()[0]
     print(f'Total Gross Revenue: {gross:,.2f}')
     
-    cur.execute('SELECT SUM(DISCOUNTAMOUNT) FROM ORDER_DETAILS_FACT')
+    cur.execute('SELECT SUM(DISCOUNTAMOUNT_CENTS) / 100 FROM ORDER_DETAILS_FACT')
     discount = cur.fetchone()[0]
     print(f'Total Discount ($): {discount:,.2f}')
     
-    cur.execute('SELECT SUM(NETREVENUE) FROM ORDER_DETAILS_FACT')
+    cur.execute('SELECT SUM(NETREVENUE_CENTS) / 100 FROM ORDER_DETAILS_FACT')
     net = cur.fetchone()[0]
     print(f'Total Net Revenue: {net:,.2f}')
     
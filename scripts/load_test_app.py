@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+import argparse
+import os
+import random
+import resource
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import date
+from unittest.mock import MagicMock
+
+from streamlit.runtime import Runtime
+from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+from streamlit.runtime.media_file_manager import MediaFileManager
+from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+from streamlit.testing.v1 import AppTest, app_test
+
+from load_snowflake import (
+    ORDER_DETAILS_VIEW_QUERY,
+    read_order_details_extract,
+    read_product_extract,
+    read_suppliers_extract,
+)
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_DIR = os.path.join(ROOT_DIR, 'streamlit_app')
+APP_PATH = os.path.join(APP_DIR, 'app.py')
+
+PAGES = ['Overview', 'Category and Product', 'Employees']
+DATE_RANGES = [
+    (date(1996, 10, 11), date(1997, 12, 27)),
+    (date(1996, 7, 4), date(1998, 5, 6)),
+    (date(1997, 1, 1), date(1997, 6, 30)),
+    (date(1998, 1, 1), date(1998, 5, 6)),
+]
+
+
+def build_local_database(path):
+    # Serve the data/ extracts through the same tables and view as Snowflake
+    conn = sqlite3.connect(path)
+    read_order_details_extract().to_sql('ORDER_DETAILS_FACT', conn, index=False)
+    read_product_extract().to_sql('PRODUCT_DIM', conn, index=False)
+    read_suppliers_extract().to_sql('SUPPLIERS_DIM', conn, index=False)
+    conn.execute(f'CREATE VIEW V_ORDER_DETAILS AS {ORDER_DETAILS_VIEW_QUERY}')
+    conn.commit()
+    conn.close()
+
+
+def use_local_snowflake(path):
+    # Must run before the app imports data_loader, so every later
+    # `from data_loader import ...` binds to the local stand-in
+    sys.path.insert(0, APP_DIR)
+    import data_loader
+
+    data_loader.create_snowflake_connection = lambda: sqlite3.connect(path, check_same_thread=False)
+    data_loader.query_data_version = lambda conn: 'local'
+
+
+def share_test_runtime():
+    # AppTest installs a mock Runtime before every run and clears it after,
+    # which breaks runs from other sessions in flight. Install one shared mock
+    # and point AppTest at a subclass so its per-run swaps no longer touch it.
+    runtime = MagicMock(spec=Runtime)
+    runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage('/mock/media'))
+    runtime.cache_storage_manager = MemoryCacheStorageManager()
+    Runtime._instance = runtime
+    app_test.Runtime = type('Runtime', (Runtime,), {})
+
+
+def current_rss_bytes():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        # ru_maxrss is the peak, in KiB on Linux and bytes on macOS
+        scale = 1 if sys.platform == 'darwin' else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+def random_action(at, rng):
+    sidebar = at.sidebar
+    action = rng.choice(['page', 'category', 'country', 'title', 'dates'])
+    if action == 'page':
+        sidebar.radio[0].set_value(rng.choice(PAGES))
+    elif action == 'dates':
+        sidebar.date_input[0].set_value(rng.choice(DATE_RANGES))
+    else:
+        selectbox = sidebar.selectbox[['category', 'country', 'title'].index(action)]
+        # Favour "All" so the warmer sees repeated combinations
+        options = selectbox.options
+        selectbox.set_value(options[0] if rng.random() < 0.5 else rng.choice(options))
+
+
+def run_session(session_id, steps, seed, timeout, latencies, errors, lock):
+    rng = random.Random(seed + session_id)
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    for step in range(steps + 1):
+        if step:
+            random_action(at, rng)
+        started = time.perf_counter()
+        try:
+            at.run()
+        except RuntimeError as e:
+            # AppTest raises when a rerun exceeds the timeout
+            with lock:
+                errors.append((session_id, step, str(e)))
+            return
+        elapsed = time.perf_counter() - started
+        with lock:
+            latencies.append(elapsed)
+            if at.exception:
+                errors.append((session_id, step, at.exception[0].message))
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+    return statistics.quantiles(sorted_values, n=100, method='inclusive')[pct - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Simulate concurrent dashboard sessions against local extracts')
+    parser.add_argument('--sessions', type=int, default=10, help='number of simultaneous sessions')
+    parser.add_argument('--steps', type=int, default=20, help='interactions per session after the first load')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--timeout', type=float, default=60.0, help='per-rerun timeout in seconds')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'northwind.sqlite')
+        build_local_database(db_path)
+        use_local_snowflake(db_path)
+        share_test_runtime()
+
+        # Warm the shared cache_resource once so RSS growth is per session only
+        AppTest.from_file(APP_PATH, default_timeout=args.timeout).run()
+        rss_before = current_rss_bytes()
+
+        latencies = []
+        errors = []
+        lock = threading.Lock()
+        threads = [
+            threading.Thread(
+                target=run_session,
+                args=(i, args.steps, args.seed, args.timeout, latencies, errors, lock),
+            )
+            for i in range(args.sessions)
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - started
+        rss_after = current_rss_bytes()
+
+    latencies.sort()
+    print('=== Load Test Results ===')
+    print(f'Sessions: {args.sessions}, reruns: {len(latencies)}, wall time: {wall:.2f}s')
+    print(f'Throughput: {len(latencies) / wall:.2f} reruns/s')
+    for pct in (50, 95, 99):
+        # Empty when every session timed out on its first run
+        value = percentile(latencies, pct)
+        print(f'Rerun latency p{pct}: ' + ('n/a' if value is None else f'{value * 1000:.1f} ms'))
+    print(f'RSS growth: {(rss_after - rss_before) / 2**20:.1f} MiB total, '
+          f'{(rss_after - rss_before) / 2**20 / args.sessions:.2f} MiB per session')
+    if errors:
+        print(f'Errors: {len(errors)}')
+        for session_id, step, message in errors[:10]:
+            print(f'  session {session_id} step {step}: {message}')
+    if errors or not latencies:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
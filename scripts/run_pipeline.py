@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+import argparse
+import hashlib
+import inspect
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(__file__))
+import extract_postgres
+import load_snowflake
+import verify_data
+
+STATE_PATH = os.path.join(load_snowflake.DATA_DIR, '.pipeline_state.json')
+
+
+@dataclass
+class Stage:
+    name: str
+    run: object
+    # Called with the upstream fingerprints once all deps are done; a stage is
+    # skipped when this matches the last successful run
+    fingerprint: object
+    deps: list = field(default_factory=list)
+    outputs: list = field(default_factory=list)
+
+
+def digest(*parts):
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def with_snowflake(fn, *args):
+    conn = load_snowflake.get_snowflake_connection()
+    try:
+        return fn(conn, *args)
+    finally:
+        conn.close()
+
+
+def extract_stage(name, filename, extract_fn):
+    path = os.path.join(extract_postgres.OUTPUT_DIR, filename)
+    tables = extract_postgres.EXTRACT_SOURCE_TABLES[filename]
+
+    def run():
+        os.makedirs(extract_postgres.OUTPUT_DIR, exist_ok=True)
+        df = extract_fn()
+        # Write beside the extract and swap it in, so a failed or interrupted
+        # run never leaves a truncated CSV for the load stage or the app
+        tmp_path = f'{path}.tmp'
+        df.to_csv(tmp_path, index=False)
+        os.replace(tmp_path, path)
+        print(f'  Exported {len(df)} rows to {filename}')
+
+    def fingerprint(upstream):
+        # The extract source carries the SQL and column transforms, so editing
+        # it invalidates the extract even when the source rows are unchanged
+        return digest(filename, inspect.getsource(extract_fn), extract_postgres.source_row_counts(tables))
+
+    return Stage(name, run, fingerprint, outputs=[path])
+
+
+def load_stage(name, table_name, extract_name, filename, read_fn):
+    path = os.path.join(load_snowflake.DATA_DIR, filename)
+
+    def run():
+        with_snowflake(load_snowflake.load_table, table_name, read_fn())
+
+    def fingerprint(upstream):
+        return digest(table_name, inspect.getsource(read_fn), file_sha256(path))
+
+    return Stage(name, run, fingerprint, deps=['setup_database', extract_name])
+
+
+def build_stages():
+    return [
+        extract_stage('extract_order_details', 'order_details_fact.csv', extract_postgres.extract_order_details_fact),
+        extract_stage('extract_product', 'product_dim.csv', extract_postgres.extract_product_dim),
+        extract_stage('extract_suppliers', 'suppliers_dim.csv', extract_postgres.extract_suppliers_dim),
+        Stage(
+            'setup_database',
+            lambda: with_snowflake(load_snowflake.setup_database),
+            lambda upstream: digest(inspect.getsource(load_snowflake.setup_database), load_snowflake.DATABASE_NAME,
+                                   load_snowflake.SCHEMA_NAME, load_snowflake.EXPORT_STAGE),
+        ),
+        load_stage('load_order_details', 'ORDER_DETAILS_FACT', 'extract_order_details',
+                   'order_details_fact.csv', load_snowflake.read_order_details_extract),
+        load_stage('load_product', 'PRODUCT_DIM', 'extract_product',
+                   'product_dim.csv', load_snowflake.read_product_extract),
+        load_stage('load_suppliers', 'SUPPLIERS_DIM', 'extract_suppliers',
+                   'suppliers_dim.csv', load_snowflake.read_suppliers_extract),
+        Stage(
+            'create_views',
+            lambda: with_snowflake(load_snowflake.create_views),
+            lambda upstream: digest(load_snowflake.ORDER_DETAILS_VIEW_QUERY, upstream),
+            deps=['load_order_details', 'load_product'],
+        ),
+        Stage(
+            'verify',
+            verify_data.main,
+            lambda upstream: digest(verify_data.CHECKS, upstream),
+            deps=['create_views', 'load_suppliers'],
+        ),
+    ]
+
+
+def load_state():
+    if not os.path.exists(STATE_PATH):
+        return {}
+    with open(STATE_PATH) as f:
+        return json.load(f)
+
+
+def save_state(state):
+    tmp_path = f'{STATE_PATH}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, STATE_PATH)
+
+
+def is_up_to_date(stage, record, fp):
+    if not record or record.get('status') != 'succeeded' or record.get('fingerprint') != fp:
+        return False
+    outputs = record.get('outputs', {})
+    return all(os.path.exists(path) and outputs.get(path) == file_sha256(path) for path in stage.outputs)
+
+
+def execute_stage(stage, record, upstream, force):
+    started = time.perf_counter()
+    fp = stage.fingerprint(upstream)
+    if not force and is_up_to_date(stage, record, fp):
+        return 'skipped', fp, time.perf_counter() - started
+
+    print(f'[{stage.name}] running...')
+    stage.run()
+    return 'succeeded', fp, time.perf_counter() - started
+
+
+def run_pipeline(stages, force=False, workers=4):
+    state = load_state()
+    by_name = {stage.name: stage for stage in stages}
+    fingerprints = {}
+    results = {}
+    pending = list(stages)
+    running = {}
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while pending or running:
+            progressed = False
+            for stage in list(pending):
+                dep_status = [results.get(dep, (None,))[0] for dep in stage.deps]
+                if any(status in ('failed', 'blocked') for status in dep_status):
+                    pending.remove(stage)
+                    results[stage.name] = ('blocked', 0.0)
+                    progressed = True
+                elif all(status in ('succeeded', 'skipped') for status in dep_status):
+                    pending.remove(stage)
+                    upstream = {dep: fingerprints[dep] for dep in stage.deps}
+                    future = pool.submit(execute_stage, stage, state.get(stage.name), upstream, force)
+                    running[future] = (stage, time.perf_counter())
+                    progressed = True
+
+            if not running:
+                if not progressed:
+                    raise ValueError(f'Unresolvable stage dependencies: {[stage.name for stage in pending]}')
+                continue
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, submitted = running.pop(future)
+                try:
+                    status, fp, elapsed = future.result()
+                except Exception as e:
+                    print(f'[{stage.name}] failed: {e}')
+                    results[stage.name] = ('failed', time.perf_counter() - submitted)
+                    state[stage.name] = dict(state.get(stage.name, {}), status='failed', error=str(e))
+                    save_state(state)
+                    continue
+
+                fingerprints[stage.name] = fp
+                results[stage.name] = (status, elapsed)
+                if status == 'succeeded':
+                    state[stage.name] = dict(
+                        status='succeeded',
+                        fingerprint=fp,
+                        outputs={path: file_sha256(path) for path in by_name[stage.name].outputs},
+                        completed_at=datetime.now(timezone.utc).isoformat(),
+                        seconds=round(elapsed, 3),
+                    )
+                    save_state(state)
+                else:
+                    print(f'[{stage.name}] up to date, skipped')
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run extract -> load -> view -> verify, skipping unchanged stages')
+    parser.add_argument('--force', action='store_true', help='re-run every stage regardless of saved state')
+    parser.add_argument('--workers', type=int, default=4, help='maximum stages run in parallel')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    stages = build_stages()
+    results = run_pipeline(stages, force=args.force, workers=args.workers)
+
+    print()
+    print('=== Pipeline Summary ===')
+    for stage in stages:
+        status, elapsed = results[stage.name]
+        print(f'{stage.name:<24} {status:<10} {elapsed:8.2f}s')
+    print(f'Total: {time.perf_counter() - started:.2f}s')
+
+    if any(status in ('failed', 'blocked') for status, _ in results.values()):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,92 +1,57 @@
-
-import snowflake.connector
-from cryptography.hazmat.backends import default_backend
-from cryptography.hazmat.primitives import serialization
 import os
-
-# Connect to Snowflake
-private_key_path = os.path.expanduser("~/.ssh/sv_pv_rsa_ket.p8")
-with open(private_key_path, "rb") as f:
-    private_key = serialization.load_pem_private_key(
-        f.read(), password=None, backend=default_backend()
-    )
-
-private_key_bytes = private_key.private_bytes(
-    encoding=serialization.Encoding.DER,
-    format=serialization.PrivateFormat.PKCS8,
-    encryption_algorithm=serialization.NoEncryption()
-)
-
-conn = snowflake.connector.connect(
-    account="sfengineering-ai_powered_playground",
-    user="SNOWVATION_AI_FIRST_SVC",
-    private_key=private_key_bytes,
-    role="unit_tester",
-    warehouse="unit_tester_warehouse",
-    database="NORTHWIND_f90022",
-    schema="PUBLIC"
-)
-
-cur = conn.cursor()
-
-# Apply the same date filter as PowerBI dashboard (1996-11-10 to 1997-12-27)
-print("=" * 60)
-print("Verification with PowerBI date filter (1996-11-10 to 1997-12-27)")
-print("=" * 60)
-
-# Gross Revenue
-cur.execute("""
-SELECT SUM(GROSSREVENUE) 
-FROM ORDER_DETAILS_FACT 
-WHERE ORDERDATE >= '1996-11-10' AND ORDERDATE <= '1997-12-27'
-""")
-gross = cur.fetchone()[0]
-print(f"Gross Revenue: {gross:,.2f} (PowerBI: 774.4K = 774,400)")
-
-# Discount
-cur.execute("""
-SELECT SUM(DISCOUNTAMOUNT) 
-FROM ORDER_DETAILS_FACT 
-WHERE ORDERDATE >= '1996-11-10' AND ORDERDATE <= '1997-12-27'
-""")
-discount = cur.fetchone()[0]
-print(f"Discount ($): {discount:,.2f} (PowerBI: 51.7K = 51,700)")
-
-# Net Revenue
-cur.execute("""
-SELECT SUM(NETREVENUE) 
-FROM ORDER_DETAILS_FACT 
-WHERE ORDERDATE >= '1996-11-10' AND ORDERDATE <= '1997-12-27'
-""")
-net = cur.fetchone()[0]
-print(f"Net Revenue: {net:,.2f} (PowerBI: 722.6K = 722,600)")
-
-# Orders (distinct count)
-cur.execute("""
-SELECT COUNT(DISTINCT ORDERID) 
-FROM ORDER_DETAILS_FACT 
-WHERE ORDERDATE >= '1996-11-10' AND ORDERDATE <= '1997-12-27'
-""")
-orders = cur.fetchone()[0]
-print(f"Orders: {orders} (PowerBI: 474)")
-
-# Quantity
-cur.execute("""
-SELECT SUM(QUANTITY) 
-FROM ORDER_DETAILS_FACT 
-WHERE ORDERDATE >= '1996-11-10' AND ORDERDATE <= '1997-12-27'
-""")
-qty = cur.fetchone()[0]
-print(f"Quantity: {qty:,} (PowerBI: 30.3K = 30,300)")
-
-# Average Days to Ship
-cur.execute("""
-SELECT AVG(DAYSTOSHIP) 
-FROM ORDER_DETAILS_FACT 
-WHERE ORDERDATE >= '1996-11-10' AND ORDERDATE <= '1997-12-27' 
-AND DAYSTOSHIP IS NOT NULL
-""")
-avg_days = cur.fetchone()[0]
-print(f"Avg Days to Ship: {avg_days:.2f} (PowerBI: 8.39)")
-
-conn.close()
+import sys
+
+sys.path.insert(0, os.path.dirname(__file__))
+from load_snowflake import DATABASE_NAME, SCHEMA_NAME, get_snowflake_connection
+
+DATE_FILTER = "ORDERDATE >= '1996-10-11' AND ORDERDATE <= '1997-12-27'"
+
+# (label, expression, PowerBI value, tolerance). PowerBI shows money and
+# quantity rounded to 0.1K and days to 2 decimals, so the tolerance is half
+# of the displayed precision
+CHECKS = [
+    ('Gross Revenue', 'SUM(GROSSREVENUE_CENTS) / 100', 774_400, 50),
+    ('Discount ($)', 'SUM(DISCOUNTAMOUNT_CENTS) / 100', 51_700, 50),
+    ('Net Revenue', 'SUM(NETREVENUE_CENTS) / 100', 722_600, 50),
+    ('Orders', 'COUNT(DISTINCT ORDERID)', 474, 0),
+    ('Quantity', 'SUM(QUANTITY)', 30_300, 50),
+    ('Avg Days to Ship', 'AVG(DAYSTOSHIP)', 8.39, 0.005),
+]
+
+
+def main():
+    conn = get_snowflake_connection()
+
+    try:
+        cur = conn.cursor()
+        cur.execute(f'USE DATABASE {DATABASE_NAME}')
+        cur.execute(f'USE SCHEMA {SCHEMA_NAME}')
+
+        # Apply the same date filter as PowerBI dashboard (1996-10-11 to 1997-12-27)
+        print("=" * 60)
+        print("Verification with PowerBI date filter (1996-10-11 to 1997-12-27)")
+        print("=" * 60)
+
+        mismatches = []
+        for label, expression, expected, tolerance in CHECKS:
+            # AVG ignores NULL DAYSTOSHIP (unshipped orders), matching PowerBI
+            cur.execute(f"""
+            SELECT {expression}
+            FROM ORDER_DETAILS_FACT
+            WHERE {DATE_FILTER}
+            """)
+            value = cur.fetchone()[0]
+            value = float(value) if value is not None else float('nan')
+            ok = abs(value - expected) <= tolerance
+            print(f"{label}: {value:,.2f} (PowerBI: {expected:,}) {'OK' if ok else 'MISMATCH'}")
+            if not ok:
+                mismatches.append(label)
+    finally:
+        conn.close()
+
+    if mismatches:
+        raise ValueError(f"Totals do not match PowerBI: {', '.join(mismatches)}")
+
+
+if __name__ == '__main__':
+    main()
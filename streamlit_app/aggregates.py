@@ -0,0 +1,123 @@
+from datetime import date
+
+import pandas as pd
+
+from data_loader import MONEY_COLUMNS
+
+PAGES = ["Overview", "Category and Product", "Employees"]
+
+# Default to match PowerBI screenshot (1996-10-11 to 1997-12-27)
+DEFAULT_START_DATE = date(1996, 10, 11)
+DEFAULT_END_DATE = date(1997, 12, 27)
+
+DEFAULT_FILTERS = dict(
+    category=None,
+    country=None,
+    title=None,
+    start_date=DEFAULT_START_DATE,
+    end_date=DEFAULT_END_DATE,
+)
+
+
+def filter_key(filters):
+    return tuple(sorted(filters.items()))
+
+
+def prepare_order_details(df):
+    df['orderdate'] = pd.to_datetime(df['orderdate'])
+    df['shippeddate'] = pd.to_datetime(df['shippeddate'])
+    return df
+
+
+def apply_filters(df, category=None, country=None, title=None, start_date=None, end_date=None):
+    filtered_df = df
+
+    if category is not None:
+        filtered_df = filtered_df[filtered_df['categoryname'] == category]
+
+    if country is not None:
+        filtered_df = filtered_df[filtered_df['country'] == country]
+
+    if title is not None:
+        filtered_df = filtered_df[filtered_df['title'] == title]
+
+    if start_date is not None and end_date is not None:
+        filtered_df = filtered_df[
+            (filtered_df['orderdate'].dt.date >= start_date) &
+            (filtered_df['orderdate'].dt.date <= end_date)
+        ]
+
+    return filtered_df
+
+
+def overview_aggregates(filtered_df, products):
+    # KPI cards and the monthly chart are served by the daily prefix-sum index
+    geo_data = filtered_df.groupby(['country', 'city'])['netrevenue_cents'].sum().reset_index()
+    geo_data['netrevenue'] = geo_data['netrevenue_cents'] / 100
+
+    shipping = filtered_df.groupby('shippingcompany')['daystoship'].mean().sort_values(ascending=True).reset_index()
+
+    return dict(geo_data=geo_data, shipping=shipping)
+
+
+def category_aggregates(filtered_df, products):
+    product_orders = filtered_df.groupby('productname')['orderid'].nunique().reset_index()
+    product_orders.columns = ['Product', 'Orders']
+
+    cat_perf = filtered_df.groupby('categoryname').agg({
+        'orderid': 'nunique',
+        'quantity': 'sum',
+        'grossrevenue_cents': 'sum',
+        'discountamount_cents': 'sum',
+        'netrevenue_cents': 'sum'
+    }).reset_index()
+    cat_perf[MONEY_COLUMNS] = cat_perf[MONEY_COLUMNS] / 100
+    cat_perf.columns = ['Category Name', 'Orders', 'Quantity', 'Gross Revenue', 'Discount ($)', 'Net Revenue']
+
+    stock = products.groupby('categoryname').agg({
+        'unitsinstock': 'sum',
+        'unitsonorder': 'sum'
+    }).reset_index()
+    stock.columns = ['Category Name', 'Units In Stock', 'Units On Order']
+
+    return dict(product_orders=product_orders, cat_perf=cat_perf, stock=stock)
+
+
+def employee_aggregates(filtered_df, products):
+    emp_orders = filtered_df.groupby('employeename')['orderid'].nunique().reset_index()
+    emp_orders.columns = ['Employee', 'Orders']
+
+    title_perf = filtered_df.groupby('title').agg({
+        'orderid': 'nunique',
+        'quantity': 'sum',
+        'grossrevenue_cents': 'sum',
+        'discountamount_cents': 'sum',
+        'netrevenue_cents': 'sum'
+    }).reset_index()
+    title_perf[MONEY_COLUMNS] = title_perf[MONEY_COLUMNS] / 100
+    title_perf.columns = ['Title', 'Orders', 'Quantity', 'Gross Revenue', 'Discount ($)', 'Net Revenue']
+
+    emp_rev = filtered_df.groupby('employeename').agg({
+        'netrevenue_cents': 'sum',
+        'orderid': 'nunique'
+    }).reset_index()
+    emp_rev['rev_per_order'] = emp_rev['netrevenue_cents'] / 100 / emp_rev['orderid']
+    emp_rev = emp_rev.sort_values('rev_per_order', ascending=False)
+
+    return dict(emp_orders=emp_orders, title_perf=title_perf, emp_rev=emp_rev)
+
+
+PAGE_AGGREGATES = {
+    "Overview": overview_aggregates,
+    "Category and Product": category_aggregates,
+    "Employees": employee_aggregates,
+}
+
+
+def compute_page_aggregates(page, df, products, filters):
+    return PAGE_AGGREGATES[page](apply_filters(df, **filters), products)
+
+
+def compute_all_aggregates(df, products, filters):
+    filtered_df = apply_filters(df, **filters)
+    return {page: PAGE_AGGREGATES[page](filtered_df, products) for page in PAGES}
@@ -1,13 +1,17 @@
 import streamlit as st
-import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from datetime import datetime, date
+import math
 import sys
+import time
 import os
 
 sys.path.insert(0, os.path.dirname(__file__))
-from data_loader import load_order_details, load_products
+from data_loader import EXPORT_URL_TTL_SECONDS, unload_order_details
+from aggregates import PAGES, DEFAULT_START_DATE, DEFAULT_END_DATE, compute_page_aggregates, filter_key
+from cache_warmer import get_cache_warmer
+from time_index import get_daily_index, previous_period
+from export import EXPORT_FORMATS, table_to_bytes
 
 st.set_page_config(
     page_title="Northwind Dashboard",
@@ -28,13 +32,11 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Load data
-df = load_order_details()
-products = load_products()
-
-# Convert dates
-df['orderdate'] = pd.to_datetime(df['orderdate'])
-df['shippeddate'] = pd.to_datetime(df['shippeddate'])
+# Load data from the warmed snapshot; it is shared across sessions, so treat it as read-only
+cache_warmer = get_cache_warmer()
+snapshot = cache_warmer.snapshot
+df = snapshot.order_details
+products = snapshot.products
 
 # Sidebar navigation
 st.sidebar.markdown("""
@@ -46,7 +48,7 @@ st.sidebar.markdown("""
 
 page = st.sidebar.radio(
     "",
-    ["Overview", "Category and Product", "Employees"],
+    PAGES,
     label_visibility="collapsed"
 )
 
@@ -68,35 +70,55 @@ selected_title = st.sidebar.selectbox("Title, Employee Name", ["All"] + list(tit
 # Date range filter
 min_date = df['orderdate'].min().date()
 max_date = df['orderdate'].max().date()
-# Default to match PowerBI screenshot (1996-11-10 to 1997-12-27)
-default_start = date(1996, 10, 11)
-default_end = date(1997, 12, 27)
 
 date_range = st.sidebar.date_input(
     "Date Range",
-    value=(default_start, default_end),
+    value=(DEFAULT_START_DATE, DEFAULT_END_DATE),
     min_value=min_date,
     max_value=max_date
 )
 
-# Apply filters
-filtered_df = df.copy()
+if len(date_range) == 2:
+    start_date, end_date = date_range
+else:
+    start_date, end_date = None, None
 
-if selected_category != "All":
-    filtered_df = filtered_df[filtered_df['categoryname'] == selected_category]
+filters = dict(
+    category=None if selected_category == "All" else selected_category,
+    country=None if selected_country == "All" else selected_country,
+    title=None if selected_title == "All" else selected_title,
+    start_date=start_date,
+    end_date=end_date,
+)
+cache_warmer.record_usage(filters)
 
-if selected_country != "All":
-    filtered_df = filtered_df[filtered_df['country'] == selected_country]
+# Apply filters, reusing the pre-computed aggregates when the warmer has them
+warmed = snapshot.aggregates.get(filter_key(filters))
+if warmed is not None:
+    aggs = warmed[page]
+else:
+    aggs = compute_page_aggregates(page, df, products, filters)
 
-if selected_title != "All":
-    filtered_df = filtered_df[filtered_df['title'] == selected_title]
+# Export
+st.sidebar.markdown("### Export")
+export_format = st.sidebar.radio("Export format", list(EXPORT_FORMATS), horizontal=True)
+export_suffix, export_mime = EXPORT_FORMATS[export_format]
+export_key = (export_format, filter_key(filters))
 
-if len(date_range) == 2:
-    start_date, end_date = date_range
-    filtered_df = filtered_df[
-        (filtered_df['orderdate'].dt.date >= start_date) &
-        (filtered_df['orderdate'].dt.date <= end_date)
-    ]
+# Snowflake unloads the filtered rows to a stage and returns a short-lived
+# link, so the export never passes through this worker whatever its size
+if st.sidebar.button("Prepare filtered data"):
+    with st.spinner("Exporting filtered data..."):
+        expires_at = time.time() + EXPORT_URL_TTL_SECONDS
+        st.session_state['export'] = dict(
+            key=export_key,
+            url=unload_order_details(f"order_details_filtered{export_suffix}", export_format, **filters),
+            expires_at=expires_at,
+        )
+
+prepared = st.session_state.get('export')
+if prepared and prepared['key'] == export_key and time.time() < prepared['expires_at']:
+    st.sidebar.link_button("Download filtered data", prepared['url'])
 
 
 def format_number(num):
@@ -105,38 +127,73 @@ def format_number(num):
     return f"{num:.0f}"
 
 
+def format_delta(current, previous, key):
+    # avg_days is NaN when a window has no shipped orders
+    value, base = current[key], previous.get(key)
+    if base is None or not (math.isfinite(value) and math.isfinite(base)) or base == 0:
+        return None
+    return f"{value / base - 1:+.1%}"
+
+
+def download_table(table, file_stem, columns=None):
+    # columns maps the chart's working columns to display headers; anything
+    # not listed (e.g. *_cents helpers) is left out of the download
+    if columns is not None:
+        table = table[list(columns)].rename(columns=columns)
+    st.download_button(
+        f"Download {export_format}",
+        data=lambda: table_to_bytes(table, export_format),
+        file_name=f"{file_stem}{export_suffix}",
+        mime=export_mime,
+        key=f"download_{file_stem}",
+        on_click="ignore"
+    )
+
+
 if page == "Overview":
     st.markdown("<h1 style=margin-bottom:0>Overview Dashboard</h1>", unsafe_allow_html=True)
     
     # KPI Cards
     col1, col2, col3, col4, col5, col6 = st.columns(6)
     
-    gross_rev = filtered_df['grossrevenue'].sum()
-    discount = filtered_df['discountamount'].sum()
-    net_rev = filtered_df['netrevenue'].sum()
-    orders = filtered_df['orderid'].nunique()
-    quantity = filtered_df['quantity'].sum()
-    avg_days = filtered_df['daystoship'].mean()
+    daily_index = get_daily_index(snapshot.daily_indexes, df, filters)
+    kpis = daily_index.kpis(start_date, end_date)
+    gross_rev = kpis['gross_rev']
+    discount = kpis['discount']
+    net_rev = kpis['net_rev']
+    orders = kpis['orders']
+    quantity = kpis['quantity']
+    avg_days = kpis['avg_days']
+    
+    # Period-over-period deltas against the equally long window just before;
+    # skipped when that window starts before the first order, as it would be
+    # silently clipped to the days that have data
+    previous = {}
+    if start_date is not None and end_date is not None:
+        previous_start, previous_end = previous_period(start_date, end_date)
+        if previous_start >= min_date:
+            previous = daily_index.kpis(previous_start, previous_end)
     
     with col1:
-        st.metric("Sum of Gross Revenue", format_number(gross_rev))
+        st.metric("Sum of Gross Revenue", format_number(gross_rev), format_delta(kpis, previous, 'gross_rev'))
     with col2:
-        st.metric("Sum of Discount ($)", format_number(discount))
+        st.metric("Sum of Discount ($)", format_number(discount), format_delta(kpis, previous, 'discount'))
     with col3:
-        st.metric("Sum of Net Revenue", format_number(net_rev))
+        st.metric("Sum of Net Revenue", format_number(net_rev), format_delta(kpis, previous, 'net_rev'))
     with col4:
-        st.metric("Orders", f"{orders:,}")
+        st.metric("Orders", f"{orders:,}", format_delta(kpis, previous, 'orders'))
     with col5:
-        st.metric("Sum of Quantity", format_number(quantity))
+        st.metric("Sum of Quantity", format_number(quantity), format_delta(kpis, previous, 'quantity'))
     with col6:
-        st.metric("Avg Days to Ship", f"{avg_days:.2f}")
+        st.metric("Avg Days to Ship", f"{avg_days:.2f}", format_delta(kpis, previous, 'avg_days'),
+                  delta_color="inverse")
     
     # Charts row
     col1, col2 = st.columns(2)
     
     with col1:
         st.markdown("### Net Revenue by Country and City")
-        geo_data = filtered_df.groupby(['country', 'city'])['netrevenue'].sum().reset_index()
+        geo_data = aggs['geo_data']
         fig = px.scatter_geo(
             geo_data,
             locations="country",
@@ -151,14 +208,12 @@ if page == "Overview":
             geo=dict(showframe=False, showcoastlines=True)
         )
         st.plotly_chart(fig, use_container_width=True)
+        download_table(geo_data, "net_revenue_by_country_city",
+                       {"country": "Country", "city": "City", "netrevenue": "Net Revenue"})
     
     with col2:
         st.markdown("### Total Orders Vs Gross Revenue by Month")
-        monthly = filtered_df.groupby(filtered_df['orderdate'].dt.to_period('M')).agg({
-            'orderid': 'nunique',
-            'grossrevenue': 'sum'
-        }).reset_index()
-        monthly['orderdate'] = monthly['orderdate'].astype(str)
+        monthly = daily_index.monthly(start_date, end_date)
         
         fig = go.Figure()
         fig.add_trace(go.Bar(x=monthly['orderdate'], y=monthly['grossrevenue'], 
@@ -173,10 +228,12 @@ if page == "Overview":
             margin=dict(l=0, r=0, t=30, b=0)
         )
         st.plotly_chart(fig, use_container_width=True)
+        download_table(monthly, "orders_gross_revenue_by_month",
+                       {"orderdate": "Month", "orderid": "Orders", "grossrevenue": "Gross Revenue"})
     
     # Bottom chart
     st.markdown("### Average Days to Ship by Shipping Company")
-    shipping = filtered_df.groupby('shippingcompany')['daystoship'].mean().sort_values(ascending=True).reset_index()
+    shipping = aggs['shipping']
     fig = px.bar(shipping, y='shippingcompany', x='daystoship', orientation='h',
                 color_discrete_sequence=['#4a90d9'],
                 text='daystoship')
@@ -187,6 +244,8 @@ if page == "Overview":
         margin=dict(l=0, r=0, t=0, b=0)
     )
     st.plotly_chart(fig, use_container_width=True)
+    download_table(shipping, "avg_days_to_ship_by_shipper",
+                   {"shippingcompany": "Shipping Company", "daystoship": "Average Days to Ship"})
 
 
 elif page == "Category and Product":
@@ -196,8 +255,7 @@ elif page == "Category and Product":
     
     with col1:
         st.markdown("### Top/Bottom 5 Products by Orders")
-        product_orders = filtered_df.groupby('productname')['orderid'].nunique().reset_index()
-        product_orders.columns = ['Product', 'Orders']
+        product_orders = aggs['product_orders']
         
         top5 = product_orders.nlargest(5, 'Orders')
         fig = px.bar(top5, y='Product', x='Orders', orientation='h',
@@ -210,26 +268,18 @@ elif page == "Category and Product":
                     color_discrete_sequence=['#ff7043'], title='Bottom 5 Products')
         fig.update_layout(yaxis=dict(autorange='reversed'))
         st.plotly_chart(fig, use_container_width=True)
+        download_table(product_orders, "product_orders")
     
     with col2:
         st.markdown("### Category and Product level Performance")
-        cat_perf = filtered_df.groupby('categoryname').agg({
-            'orderid': 'nunique',
-            'quantity': 'sum',
-            'grossrevenue': 'sum',
-            'discountamount': 'sum',
-            'netrevenue': 'sum'
-        }).reset_index()
-        cat_perf.columns = ['Category Name', 'Orders', 'Quantity', 'Gross Revenue', 'Discount ($)', 'Net Revenue']
+        cat_perf = aggs['cat_perf']
         st.dataframe(cat_perf, use_container_width=True, hide_index=True)
+        download_table(cat_perf, "category_performance")
         
         st.markdown("### Unit in Stock and Unit on Order")
-        stock = products.groupby('categoryname').agg({
-            'unitsinstock': 'sum',
-            'unitsonorder': 'sum'
-        }).reset_index()
-        stock.columns = ['Category Name', 'Units In Stock', 'Units On Order']
+        stock = aggs['stock']
         st.dataframe(stock, use_container_width=True, hide_index=True)
+        download_table(stock, "units_in_stock_on_order")
     
     st.markdown("### Units in Stock by Category")
     fig = px.bar(stock, x='Category Name', y='Units In Stock',
@@ -246,8 +296,7 @@ elif page == "Employees":
     
     with col1:
         st.markdown("### Top/Bottom 5 Employees by Orders")
-        emp_orders = filtered_df.groupby('employeename')['orderid'].nunique().reset_index()
-        emp_orders.columns = ['Employee', 'Orders']
+        emp_orders = aggs['emp_orders']
         
         top5 = emp_orders.nlargest(5, 'Orders')
         fig = px.bar(top5, y='Employee', x='Orders', orientation='h',
@@ -260,18 +309,13 @@ elif page == "Employees":
                     color_discrete_sequence=['#ff7043'], title='Bottom 5 Employees')
         fig.update_layout(yaxis=dict(autorange='reversed'))
         st.plotly_chart(fig, use_container_width=True)
+        download_table(emp_orders, "employee_orders")
     
     with col2:
         st.markdown("### Title and Employee level Performance")
-        title_perf = filtered_df.groupby('title').agg({
-            'orderid': 'nunique',
-            'quantity': 'sum',
-            'grossrevenue': 'sum',
-            'discountamount': 'sum',
-            'netrevenue': 'sum'
-        }).reset_index()
-        title_perf.columns = ['Title', 'Orders', 'Quantity', 'Gross Revenue', 'Discount ($)', 'Net Revenue']
+        title_perf = aggs['title_perf']
         st.dataframe(title_perf, use_container_width=True, hide_index=True)
+        download_table(title_perf, "title_performance")
     
     col1, col2 = st.columns(2)
     
@@ -283,12 +327,7 @@ elif page == "Employees":
     
     with col2:
         st.markdown("### Net Revenue per Order by Employee")
-        emp_rev = filtered_df.groupby('employeename').agg({
-            'netrevenue': 'sum',
-            'orderid': 'nunique'
-        }).reset_index()
-        emp_rev['rev_per_order'] = emp_rev['netrevenue'] / emp_rev['orderid']
-        emp_rev = emp_rev.sort_values('rev_per_order', ascending=False)
+        emp_rev = aggs['emp_rev']
         
         fig = px.bar(emp_rev, x='employeename', y='rev_per_order',
                     color_discrete_sequence=['#4a90d9'],
@@ -296,3 +335,5 @@ elif page == "Employees":
         fig.update_traces(textposition='outside')
         fig.update_layout(xaxis_title='Employee Name', yaxis_title='Net Revenue per Order')
         st.plotly_chart(fig, use_container_width=True)
+        download_table(emp_rev, "net_revenue_per_order_by_employee",
+                       {"employeename": "Employee", "orderid": "Orders", "rev_per_order": "Net Revenue per Order"})
@@ -0,0 +1,152 @@
+import logging
+import threading
+import time
+from collections import Counter, deque
+from dataclasses import dataclass
+
+import pandas as pd
+import streamlit as st
+
+from aggregates import DEFAULT_FILTERS, compute_all_aggregates, filter_key, prepare_order_details
+from data_loader import (
+    CACHE_TTL_SECONDS,
+    create_snowflake_connection,
+    query_data_version,
+    query_order_details,
+    query_products,
+)
+from time_index import get_daily_index
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL_SECONDS = 60
+USAGE_WINDOW = 1000
+TOP_FILTER_COMBINATIONS = 5
+
+
+@dataclass(frozen=True)
+class DataSnapshot:
+    version: object
+    loaded_at: float
+    order_details: pd.DataFrame
+    products: pd.DataFrame
+    aggregates: dict
+    daily_indexes: dict
+
+
+class CacheWarmer:
+    # Owns its own Snowflake connection and rebuilds the datasets and the
+    # default/most used aggregates off the request path. Readers only ever see
+    # a fully built snapshot because the swap is a single reference assignment.
+
+    def __init__(self, connect=create_snowflake_connection,
+                 poll_interval=POLL_INTERVAL_SECONDS, ttl=CACHE_TTL_SECONDS):
+        self._connect = connect
+        self._poll_interval = poll_interval
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._usage = deque(maxlen=USAGE_WINDOW)
+        self._snapshot = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def snapshot(self):
+        return self._snapshot
+
+    def record_usage(self, filters):
+        with self._lock:
+            self._usage.append(filter_key(filters))
+
+    def frequent_filters(self, limit=TOP_FILTER_COMBINATIONS):
+        with self._lock:
+            counts = Counter(self._usage)
+        return [dict(key) for key, _ in counts.most_common(limit)]
+
+    def refresh(self, conn, version):
+        started = time.perf_counter()
+        df = prepare_order_details(query_order_details(conn))
+        products = query_products(conn)
+
+        aggregates = {}
+        daily_indexes = {}
+        for filters in [DEFAULT_FILTERS] + self.frequent_filters():
+            key = filter_key(filters)
+            if key not in aggregates:
+                aggregates[key] = compute_all_aggregates(df, products, filters)
+                get_daily_index(daily_indexes, df, filters)
+
+        self._snapshot = DataSnapshot(
+            version=version,
+            loaded_at=time.monotonic(),
+            order_details=df,
+            products=products,
+            aggregates=aggregates,
+            daily_indexes=daily_indexes,
+        )
+        logger.info('Cache warmed for %d filter combinations in %.2fs',
+                    len(aggregates), time.perf_counter() - started)
+
+    def is_stale(self, version):
+        snapshot = self._snapshot
+        return (
+            snapshot is None
+            or version != snapshot.version
+            or time.monotonic() - snapshot.loaded_at >= self._ttl
+        )
+
+    def start(self):
+        # The first snapshot is built synchronously so callers never see None
+        conn = self._connect()
+        try:
+            self.refresh(conn, query_data_version(conn))
+        except Exception:
+            close_quietly(conn)
+            raise
+        self._thread = threading.Thread(target=self._run, args=(conn,), name='cache-warmer', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        # The thread wakes immediately and closes its connection on the way out
+        self._stop.set()
+
+    def _run(self, conn):
+        try:
+            while not self._stop.wait(self._poll_interval):
+                try:
+                    if conn is None:
+                        conn = self._connect()
+                    version = query_data_version(conn)
+                    if self.is_stale(version):
+                        self.refresh(conn, version)
+                except Exception:
+                    logger.exception('Cache warm-up failed, keeping the previous snapshot')
+                    close_quietly(conn)
+                    conn = None
+        finally:
+            close_quietly(conn)
+
+
+def close_quietly(conn):
+    if conn is None:
+        return
+    try:
+        conn.close()
+    except Exception:
+        logger.warning('Failed to close the cache warmer connection', exc_info=True)
+
+
+_current_warmer = None
+
+
+@st.cache_resource
+def get_cache_warmer():
+    # cache_resource has no release hook, but clearing the entry makes the
+    # next caller rebuild it here, so stop the warmer being replaced
+    global _current_warmer
+    if _current_warmer is not None:
+        _current_warmer.stop()
+    warmer = CacheWarmer()
+    warmer.start()
+    _current_warmer = warmer
+    return warmer
@@ -4,14 +4,29 @@ import pandas as pd
 from cryptography.hazmat.backends import default_backend
 from cryptography.hazmat.primitives import serialization
 import os
+import time
+import uuid
 
 DB_SUFFIX = 'f90022'
 DATABASE_NAME = f'NORTHWIND_{DB_SUFFIX}'
 SCHEMA_NAME = 'PUBLIC'
+CACHE_TTL_SECONDS = 600
 
+# Filtered exports are unloaded to this stage and served from presigned URLs
+EXPORT_STAGE = 'EXPORT_STAGE'
+EXPORT_URL_TTL_SECONDS = 3600
+# Largest single file Snowflake can unload to a stage (5 GB)
+MAX_UNLOAD_FILE_BYTES = 5 * 1024 ** 3
+UNLOAD_FILE_FORMATS = {
+    'CSV': "TYPE = CSV COMPRESSION = NONE FIELD_OPTIONALLY_ENCLOSED_BY = '\"' NULL_IF = ('')",
+    'Parquet': "TYPE = PARQUET",
+}
 
-@st.cache_resource
-def get_snowflake_connection():
+# Money columns are stored as integer cents; divide by 100 only for display
+MONEY_COLUMNS = ['grossrevenue_cents', 'discountamount_cents', 'netrevenue_cents']
+
+
+def create_snowflake_connection():
     private_key_path = os.path.expanduser('~/.ssh/sv_pv_rsa_ket.p8')
     with open(private_key_path, 'rb') as f:
         private_key = serialization.load_pem_private_key(
@@ -36,30 +51,105 @@ def get_snowflake_connection():
     return conn
 
 
-@st.cache_data(ttl=600)
-def load_order_details():
-    conn = get_snowflake_connection()
+@st.cache_resource
+def get_snowflake_connection():
+    return create_snowflake_connection()
+
+
+def query_order_details(conn):
     query = """
     SELECT * FROM V_ORDER_DETAILS
     """
     df = pd.read_sql(query, conn)
     df.columns = [c.lower() for c in df.columns]
+    df[MONEY_COLUMNS] = df[MONEY_COLUMNS].astype('int64')
     return df
 
 
-@st.cache_data(ttl=600)
-def load_products():
-    conn = get_snowflake_connection()
+def query_products(conn):
     query = "SELECT * FROM PRODUCT_DIM"
     df = pd.read_sql(query, conn)
     df.columns = [c.lower() for c in df.columns]
     return df
 
 
-@st.cache_data(ttl=600)
-def load_suppliers():
+def query_data_version(conn):
+    # Changes whenever a load rewrites any of the dashboard tables
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            """
+            SELECT MAX(LAST_ALTERED) FROM INFORMATION_SCHEMA.TABLES
+            WHERE TABLE_SCHEMA = %s
+            AND TABLE_NAME IN ('ORDER_DETAILS_FACT', 'PRODUCT_DIM', 'SUPPLIERS_DIM')
+            """,
+            (SCHEMA_NAME,)
+        )
+        return cur.fetchone()[0]
+    finally:
+        cur.close()
+
+
+def filtered_order_details_query(category=None, country=None, title=None, start_date=None, end_date=None):
+    clauses = []
+    params = []
+    if category is not None:
+        clauses.append('CATEGORYNAME = %s')
+        params.append(category)
+    if country is not None:
+        clauses.append('COUNTRY = %s')
+        params.append(country)
+    if title is not None:
+        clauses.append('TITLE = %s')
+        params.append(title)
+    if start_date is not None:
+        clauses.append('ORDERDATE >= %s')
+        params.append(start_date)
+    if end_date is not None:
+        clauses.append('ORDERDATE <= %s')
+        params.append(end_date)
+    
+    query = "SELECT * FROM V_ORDER_DETAILS"
+    if clauses:
+        query += " WHERE " + " AND ".join(clauses)
+    query += " ORDER BY ORDERID, PRODUCTID"
+    return query, params
+
+
+def remove_expired_exports(cur):
+    # Exports live under exports/<created epoch>/, so whole folders whose links
+    # have expired can be dropped without touching ones still downloadable
+    cur.execute(f"LIST @{EXPORT_STAGE}/exports/")
+    cutoff = time.time() - EXPORT_URL_TTL_SECONDS
+    expired = {row[0].split('/')[2] for row in cur.fetchall()}
+    for created in sorted(expired):
+        if int(created) < cutoff:
+            cur.execute(f"REMOVE @{EXPORT_STAGE}/exports/{created}/")
+
+
+def unload_order_details(file_name, fmt, **filters):
+    # Snowflake writes the filtered fact straight to a stage and the user
+    # downloads it from there, so no part of the export passes through the app
     conn = get_snowflake_connection()
-    query = "SELECT * FROM SUPPLIERS_DIM"
-    df = pd.read_sql(query, conn)
-    df.columns = [c.lower() for c in df.columns]
-    return df
+    query, params = filtered_order_details_query(**filters)
+    path = f"exports/{int(time.time())}/{uuid.uuid4().hex}/{file_name}"
+    
+    cur = conn.cursor()
+    try:
+        remove_expired_exports(cur)
+        cur.execute(
+            f"""
+            COPY INTO @{EXPORT_STAGE}/{path} FROM ({query})
+            FILE_FORMAT = ({UNLOAD_FILE_FORMATS[fmt]})
+            HEADER = TRUE SINGLE = TRUE OVERWRITE = TRUE
+            MAX_FILE_SIZE = {MAX_UNLOAD_FILE_BYTES}
+            """,
+            params
+        )
+        cur.execute(
+            f"SELECT GET_PRESIGNED_URL(@{EXPORT_STAGE}, %s, %s)",
+            (path, EXPORT_URL_TTL_SECONDS)
+        )
+        return cur.fetchone()[0]
+    finally:
+        cur.close()
@@ -0,0 +1,36 @@
+import io
+
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+CHUNK_ROWS = 50_000
+EXPORT_FORMATS = {
+    'CSV': ('.csv', 'text/csv'),
+    'Parquet': ('.parquet', 'application/vnd.apache.parquet'),
+}
+
+
+def iter_chunks(df, schema, chunk_rows=CHUNK_ROWS):
+    for start in range(0, len(df), chunk_rows):
+        yield pa.Table.from_pandas(df.iloc[start:start + chunk_rows], schema=schema, preserve_index=False)
+
+
+def open_writer(fh, fmt, schema):
+    if fmt == 'CSV':
+        return pa_csv.CSVWriter(fh, schema)
+    if fmt == 'Parquet':
+        return pq.ParquetWriter(fh, schema)
+    raise ValueError(f'Unsupported export format: {fmt}')
+
+
+def table_to_bytes(df, fmt):
+    # Infer the schema from the whole frame so a column that is all null in
+    # one chunk does not change type between chunks. The writer is opened
+    # with it up front, so an empty table still gets a header/schema.
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    buf = io.BytesIO()
+    with open_writer(buf, fmt, schema) as writer:
+        for chunk in iter_chunks(df, schema):
+            writer.write_table(chunk)
+    return buf.getvalue()
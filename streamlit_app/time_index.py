@@ -0,0 +1,103 @@
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from aggregates import apply_filters
+
+# Every measure is additive per day. Distinct orders are too, because an
+# order falls on exactly one order date.
+DAILY_MEASURES = dict(
+    grossrevenue_cents=('grossrevenue_cents', 'sum'),
+    discountamount_cents=('discountamount_cents', 'sum'),
+    netrevenue_cents=('netrevenue_cents', 'sum'),
+    quantity=('quantity', 'sum'),
+    orders=('orderid', 'nunique'),
+    shipdays_sum=('daystoship', 'sum'),
+    shipdays_count=('daystoship', 'count'),
+)
+
+
+def top_level_key(filters):
+    return (filters['category'], filters['country'], filters['title'])
+
+
+def previous_period(start_date, end_date):
+    length = end_date - start_date + timedelta(days=1)
+    return start_date - length, start_date - timedelta(days=1)
+
+
+class DailyIndex:
+    # Prefix sums over a dense per-day calendar, so any date range is answered
+    # by subtracting two entries instead of re-scanning the fact table
+
+    def __init__(self, df):
+        daily = df.groupby(df['orderdate'].dt.normalize()).agg(**DAILY_MEASURES)
+        if daily.empty:
+            self.origin = None
+            self.days = 0
+            self.cumulative = {m: np.zeros(1, dtype='int64') for m in DAILY_MEASURES}
+            return
+
+        calendar = pd.date_range(daily.index.min(), daily.index.max(), freq='D')
+        daily = daily.reindex(calendar, fill_value=0).astype('int64')
+        self.origin = calendar[0].date()
+        self.days = len(calendar)
+        self.cumulative = {
+            m: np.concatenate([[0], daily[m].to_numpy().cumsum()]) for m in DAILY_MEASURES
+        }
+
+    def _bounds(self, start_date=None, end_date=None):
+        if self.origin is None:
+            return 0, 0
+        lo = 0 if start_date is None else min(max((start_date - self.origin).days, 0), self.days)
+        hi = self.days if end_date is None else min(max((end_date - self.origin).days + 1, 0), self.days)
+        return lo, max(lo, hi)
+
+    def totals(self, start_date=None, end_date=None):
+        lo, hi = self._bounds(start_date, end_date)
+        return {m: int(c[hi] - c[lo]) for m, c in self.cumulative.items()}
+
+    def kpis(self, start_date=None, end_date=None):
+        totals = self.totals(start_date, end_date)
+        count = totals['shipdays_count']
+        return dict(
+            gross_rev=totals['grossrevenue_cents'] / 100,
+            discount=totals['discountamount_cents'] / 100,
+            net_rev=totals['netrevenue_cents'] / 100,
+            orders=totals['orders'],
+            quantity=totals['quantity'],
+            avg_days=totals['shipdays_sum'] / count if count else float('nan'),
+        )
+
+    def monthly(self, start_date=None, end_date=None):
+        lo, hi = self._bounds(start_date, end_date)
+        if hi == lo:
+            return pd.DataFrame(columns=['orderdate', 'orderid', 'grossrevenue_cents', 'grossrevenue'])
+
+        calendar = pd.date_range(self.origin + timedelta(days=lo), periods=hi - lo, freq='D')
+        month_ids = np.asarray(calendar.year * 12 + calendar.month)
+        first_days = np.flatnonzero(np.r_[True, month_ids[1:] != month_ids[:-1]])
+        starts = lo + first_days
+        ends = np.r_[starts[1:], hi]
+
+        orders = self.cumulative['orders']
+        gross = self.cumulative['grossrevenue_cents']
+        monthly = pd.DataFrame({
+            'orderdate': calendar[first_days].strftime('%Y-%m'),
+            'orderid': orders[ends] - orders[starts],
+            'grossrevenue_cents': gross[ends] - gross[starts],
+        })
+        # Match the groupby output, which only has months with orders
+        monthly = monthly[monthly['orderid'] > 0].reset_index(drop=True)
+        monthly['grossrevenue'] = monthly['grossrevenue_cents'] / 100
+        return monthly
+
+
+def get_daily_index(indexes, df, filters):
+    key = top_level_key(filters)
+    index = indexes.get(key)
+    if index is None:
+        top_level = dict(filters, start_date=None, end_date=None)
+        index = indexes.setdefault(key, DailyIndex(apply_filters(df, **top_level)))
+    return index